@@ -0,0 +1,17 @@
+#!/bin/bash
+# rshell_daemon.sh - Keep a warm RShell BEAM node running for CLI tests
+# Start this once, then run the automated CLI tests against it:
+#
+#   ./rshell_daemon.sh
+#   RSHELL_DAEMON_NODE=rshell_daemon python3 test_cli_automated.py
+#
+# Each test run then attaches with `elixir --rpc-eval` instead of paying
+# the full `mix run` boot and module loading cost.
+
+set -e
+
+NODE_NAME="${RSHELL_DAEMON_NODE:-rshell_daemon}"
+NODE_NAME="${NODE_NAME%%@*}"
+
+echo "🐚 Starting RShell daemon node: ${NODE_NAME}"
+exec iex --sname "${NODE_NAME}" -S mix